@@ -1,49 +1,114 @@
+import atexit
 import sqlite3
+import threading
+import time
+from array import array
+from bisect import bisect_right
+from collections import deque
+from contextlib import contextmanager
 from datetime import datetime
-from queue import Queue
+from itertools import accumulate
+from queue import Empty, SimpleQueue
 from abc import ABC, abstractmethod
 
 # Database file
 DB_NAME = 'warehouse.db'
 
+# Hot statements, kept as constants so sqlite3 reuses their prepared form
+UPDATE_BIN_SQL = 'UPDATE bins SET current_usage = ? WHERE bin_id = ?'
+INSERT_LOG_SQL = 'INSERT INTO shipment_logs VALUES (?, ?, ?, ?)'
+INSERT_BIN_SQL = 'INSERT INTO bins VALUES (?, ?, ?, ?)'
+
+CREATE_LOGS_SQL = '''
+    CREATE TABLE IF NOT EXISTS shipment_logs (
+        tracking_id TEXT,
+        bin_id INTEGER,
+        timestamp INTEGER,
+        status TEXT
+    )
+'''
+
+
+def format_ts(ns):
+    # shipment_logs stores epoch nanoseconds; format only when displaying
+    secs, rem = divmod(ns, 1_000_000_000)
+    return datetime.fromtimestamp(secs).replace(microsecond=rem // 1000).isoformat()
+
+
+def _legacy_ts_to_ns(value):
+    # Older databases stored ISO strings (or time_ns() digits as TEXT).
+    # NULL stays NULL, and anything unparseable becomes NULL.
+    if value is None or isinstance(value, int):
+        return value
+    if isinstance(value, float):
+        return int(value)
+    value = str(value)
+    if value.isdigit():
+        return int(value)
+    try:
+        dt = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    secs = int(dt.replace(microsecond=0).timestamp())
+    return secs * 1_000_000_000 + dt.microsecond * 1000
 
-class WarehouseController:
-    _instance = None
-
-    # Singleton pattern implementation
-    def __new__(cls):
-        if cls._instance is None:
-            cls._instance = super(WarehouseController, cls).__new__(cls)
-            cls._instance._initialized = False
-        return cls._instance
 
+class WarehouseController:
+    # Singleton: obtain the shared instance through get_controller()
     def __init__(self):
-        if self._initialized:
-            return
+        global _controller
+        # A second instance would fight the first over the exclusive db lock
+        if _controller is not None:
+            raise RuntimeError("WarehouseController already exists; use get_controller()")
 
         self.bins = []
-        self.conveyor = Queue()
+        # Segment tree over self.bins: each node holds the max available space
+        # of its subtree, leaves start at self._leaf_base
+        self._seg = [-1, -1]
+        self._leaf_base = 1
+        self._bin_pos = {}  # bin_id -> index in self.bins
+        self._search = None  # Unrolled search for small layouts (see _compile_search)
+        self.conveyor = deque()  # FIFO; single-threaded, so no locking needed
         self.truck_stack = []  # LIFO stack for the truck
         self.conn = None
 
+        # Writes buffered while a batch is open (see begin_batch)
+        self._batching = False
+        self._bin_updates = []
+        self._batch_logs = []
+
+        # Shipment logs are written off the hot path by a background thread;
+        # _db_lock keeps its transactions apart from the main thread's
+        self._db_lock = threading.Lock()
+        self._log_q = SimpleQueue()
+
         self.connect_db()
-        self._initialized = True
+        threading.Thread(target=self._drain_logs, daemon=True).start()
+        atexit.register(self.flush_logs)
+        _controller = self
 
     def connect_db(self):
-        self.conn = sqlite3.connect(DB_NAME, check_same_thread=False)
+        # Autocommit mode: transactions are opened explicitly in transaction()
+        self.conn = sqlite3.connect(DB_NAME, check_same_thread=False, isolation_level=None)
+
+        # Single process owns the file, so hold the lock and skip shared memory
+        self.conn.execute('PRAGMA locking_mode=EXCLUSIVE')
+        # WAL journaling: commits append to the log instead of fsyncing the db
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute('PRAGMA temp_store=MEMORY')
+        self.conn.execute('PRAGMA cache_size=-65536')  # 64 MB page cache
+        self.conn.execute('PRAGMA mmap_size=268435456')  # 256 MB memory map
+
+        # Single cursor shared by every write: bins, logs, seeding, migration (under _db_lock)
+        self._write_cursor = self.conn.cursor()
         cursor = self.conn.cursor()
 
         # Resetting table for a clean run every time
         cursor.execute('DROP TABLE IF EXISTS bins')
 
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS shipment_logs (
-                tracking_id TEXT,
-                bin_id INTEGER,
-                timestamp TEXT,
-                status TEXT
-            )
-        ''')
+        cursor.execute(CREATE_LOGS_SQL)
+        self._migrate_shipment_logs()
 
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS bins (
@@ -53,7 +118,40 @@ class WarehouseController:
                 location_code TEXT
             )
         ''')
-        self.conn.commit()
+
+    def _migrate_shipment_logs(self):
+        # shipment_logs survives restarts; rebuild tables from before the
+        # INTEGER timestamp column so old and new rows share one format
+        columns = {row[1]: row[2] for row in self.conn.execute('PRAGMA table_info(shipment_logs)')}
+        if columns.get('timestamp', '').upper() == 'INTEGER':
+            return
+
+        # The logs are not needed to run, so a failed migration must not
+        # block startup; the transaction rolls the old table back intact
+        try:
+            with self.transaction() as cursor:
+                rows = cursor.execute('SELECT tracking_id, bin_id, timestamp, status FROM shipment_logs').fetchall()
+                cursor.execute('DROP TABLE shipment_logs')
+                cursor.execute(CREATE_LOGS_SQL)
+                cursor.executemany(INSERT_LOG_SQL, [(t, b, _legacy_ts_to_ns(ts), st) for t, b, ts, st in rows])
+        except Exception as e:
+            print(f"Log migration failed: {e}")
+
+    @contextmanager
+    def transaction(self):
+        # One explicit BEGIN/COMMIT around a group of writes on the shared cursor
+        with self._db_lock:
+            cursor = self._write_cursor
+            cursor.execute('BEGIN')
+            try:
+                yield cursor
+                cursor.execute('COMMIT')
+            except BaseException:
+                # Also covers a failed COMMIT, which would leave the
+                # transaction open for every later BEGIN
+                if self.conn.in_transaction:
+                    cursor.execute('ROLLBACK')
+                raise
 
     def load_inventory(self):
         # Fetch bins from SQL and sort them for Binary Search
@@ -67,48 +165,99 @@ class WarehouseController:
             b.used_space = r[2]
             self.bins.append(b)
 
-        # Sort is required for binary search to work
+        # Sorted by capacity, so the leftmost fitting leaf is the best fit
         self.bins.sort()
+        self._build_seg_tree()
+        self._compile_search()
+
+    def _build_seg_tree(self):
+        base = 1
+        while base < len(self.bins):
+            base *= 2
+
+        seg = [-1] * (2 * base)  # Padding leaves never fit anything
+        for i, b in enumerate(self.bins):
+            seg[base + i] = b.available
+        for node in range(base - 1, 0, -1):
+            seg[node] = max(seg[2 * node], seg[2 * node + 1])
+
+        self._seg = seg
+        self._leaf_base = base
+        self._bin_pos = {b.bin_id: i for i, b in enumerate(self.bins)}
+
+    def _compile_search(self):
+        # Warehouses rarely add bins at runtime, so for small layouts generate
+        # an if-chain with capacities and leaf offsets baked in as constants
+        if len(self.bins) > 50:
+            self._search = None
+            return
+
+        lines = ['def _search(size, avail):']
+        for i, b in enumerate(self.bins):
+            lines.append(f'    if size <= {b.capacity!r} and avail[{self._leaf_base + i}] >= size:')
+            lines.append(f'        return {i}')
+        lines.append('    return -1')
+
+        namespace = {}
+        exec('\n'.join(lines), namespace)
+        self._search = namespace['_search']
+
+    def _update_seg(self, bin_obj):
+        # O(log N) point update after a bin's usage changed
+        seg = self._seg
+        node = self._leaf_base + self._bin_pos[bin_obj.bin_id]
+        seg[node] = bin_obj.available
+        node //= 2
+        while node:
+            seg[node] = max(seg[2 * node], seg[2 * node + 1])
+            node //= 2
 
     def add_to_conveyor(self, pkg):
-        self.conveyor.put(pkg)
+        self.conveyor.append(pkg)
 
     def run_conveyor(self):
-        print(f"\n[Conveyor] Processing {self.conveyor.qsize()} items...")
-
-        while not self.conveyor.empty():
-            pkg = self.conveyor.get()
-            target_bin = self.find_bin_binary_search(pkg)
+        print(f"\n[Conveyor] Processing {len(self.conveyor)} items...")
 
-            if target_bin:
-                try:
-                    target_bin.occupy_space(pkg.size)
-                    self.update_bin_db(target_bin)
-                    self.log_action(pkg.tracking_id, target_bin.bin_id, 'STORED')
-                    print(f" -> Stored {pkg.tracking_id} (Size {pkg.size}) in Bin {target_bin.bin_id}")
-                except Exception as e:
-                    print(f" -> Error storing {pkg.tracking_id}: {e}")
-            else:
-                print(f" -> FAIL: No suitable bin for {pkg.tracking_id} (Size {pkg.size})")
+        # All writes of a sweep go out as one transaction
+        self.begin_batch()
+        try:
+            while self.conveyor:
+                pkg = self.conveyor.popleft()
+                target_bin = self.find_bin_binary_search(pkg)
+
+                if target_bin:
+                    try:
+                        target_bin.occupy_space(pkg.size)
+                        self._update_seg(target_bin)
+                        self.update_bin_db(target_bin)
+                        self.log_action(pkg.tracking_id, target_bin.bin_id, 'STORED')
+                        print(f" -> Stored {pkg.tracking_id} (Size {pkg.size}) in Bin {target_bin.bin_id}")
+                    except Exception as e:
+                        print(f" -> Error storing {pkg.tracking_id}: {e}")
+                else:
+                    print(f" -> FAIL: No suitable bin for {pkg.tracking_id} (Size {pkg.size})")
+        finally:
+            self.end_batch()
 
     def find_bin_binary_search(self, pkg):
-        # O(log N) search for the best fit
-        low = 0
-        high = len(self.bins) - 1
-        best_fit = None
+        seg = self._seg
+        if self._search is not None:
+            idx = self._search(pkg.size, seg)
+            return self.bins[idx] if idx >= 0 else None
 
-        while low <= high:
-            mid = (low + high) // 2
-            curr = self.bins[mid]
+        # O(log N) best fit: descend to the leftmost (smallest capacity) bin
+        # whose available space holds the package. available <= capacity, so
+        # this also guarantees the capacity fits.
+        if seg[1] < pkg.size:
+            return None
 
-            # We need a bin that fits the size AND has space remaining
-            if curr.capacity >= pkg.size and curr.available_space() >= pkg.size:
-                best_fit = curr
-                high = mid - 1  # Try to find a smaller bin that still fits (optimize space)
-            else:
-                low = mid + 1
+        node = 1
+        while node < self._leaf_base:
+            node *= 2
+            if seg[node] < pkg.size:
+                node += 1  # Left subtree has no room, go right
 
-        return best_fit
+        return self.bins[node - self._leaf_base]
 
     def load_truck(self, pkg):
         self.truck_stack.append(pkg)
@@ -125,53 +274,105 @@ class WarehouseController:
         return None
 
     def optimize_truck_space(self, packages, max_cap):
-        # Backtracking algorithm to fill truck efficiently
-        best_combo = []
-        max_filled = 0
-
-        def solve(idx, current_combo, current_size):
-            nonlocal best_combo, max_filled
-
-            if current_size > max_filled:
-                max_filled = current_size
-                best_combo = list(current_combo)
-
-            if idx == len(packages):
-                return
-
-            pkg = packages[idx]
-
-            # Option 1: Take the package (if it fits)
-            if current_size + pkg.size <= max_cap:
-                current_combo.append(pkg)
-                solve(idx + 1, current_combo, current_size + pkg.size)
-                current_combo.pop()  # Backtrack
-
-            # Option 2: Skip the package
-            solve(idx + 1, current_combo, current_size)
-
-        solve(0, [], 0)
-        return best_combo
+        if max_cap < 0:
+            return []
+        packages = list(packages)
+        n = len(packages)
+
+        # 0/1 Knapsack DP (value == size) with divide-and-conquer reconstruction:
+        # O(n * max_cap) time but only O(n + max_cap) memory. It needs integer
+        # sizes, and only loses to meet-in-the-middle once the table is large
+        # and max_cap dwarfs 2^(n/2).
+        integral = isinstance(max_cap, int) and all(isinstance(p.size, int) for p in packages)
+        if integral:
+            if n * max_cap <= 10 ** 6 or max_cap <= 2 ** (n // 2):
+                return _reconstruct(packages, max_cap)
+            return _meet_in_the_middle(packages, max_cap)
+
+        # Non-integer sizes: a handful of packages is cheaper to search
+        # directly than to split
+        if n <= 12:
+            return _backtrack(packages, max_cap)
+        return _meet_in_the_middle(packages, max_cap)
+
+    def begin_batch(self):
+        # Buffer bin writes (and their logs) until end_batch() instead of
+        # committing each one
+        self._batching = True
+
+    def end_batch(self):
+        self._batching = False
+        bin_updates, self._bin_updates = self._bin_updates, []
+        batch_logs, self._batch_logs = self._batch_logs, []
+        if bin_updates:
+            try:
+                with self.transaction() as cursor:
+                    cursor.executemany(UPDATE_BIN_SQL, bin_updates)
+            except Exception as e:
+                # Nothing of the batch was stored: drop its logs and reload the
+                # bins so memory matches the database again
+                print(f"Batch write failed, batch rolled back: {e}")
+                self.load_inventory()
+                raise
+
+        for row in batch_logs:
+            self._log_q.put(row)
 
     def update_bin_db(self, bin_obj):
-        cursor = self.conn.cursor()
-        cursor.execute('UPDATE bins SET current_usage = ? WHERE bin_id = ?',
-                       (bin_obj.used_space, bin_obj.bin_id))
-        self.conn.commit()
+        row = (bin_obj.used_space, bin_obj.bin_id)
+        if self._batching:
+            self._bin_updates.append(row)
+            return
+        with self.transaction() as cursor:
+            cursor.execute(UPDATE_BIN_SQL, row)
 
     def log_action(self, tracking_id, bin_id, status):
-        try:
-            cursor = self.conn.cursor()
-            cursor.execute('INSERT INTO shipment_logs VALUES (?, ?, ?, ?)',
-                           (tracking_id, bin_id, datetime.now().isoformat(), status))
-            self.conn.commit()
-        except Exception as e:
-            print(f"Logging failed: {e}")
+        # Only an enqueue here; _drain_logs does the actual insert
+        row = (tracking_id, bin_id, time.time_ns(), status)
+        if self._batching:
+            self._batch_logs.append(row)
+            return
+        self._log_q.put(row)
+
+    def flush_logs(self):
+        # Block until every log queued so far has been committed
+        done = threading.Event()
+        self._log_q.put(done)
+        done.wait()
+
+    def _drain_logs(self):
+        while True:
+            # Gather up to 512 rows, waiting at most 50ms after the first one
+            batch = [self._log_q.get()]
+            deadline = time.monotonic() + 0.05
+            while len(batch) < 512 and not isinstance(batch[-1], threading.Event):
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._log_q.get(timeout=timeout))
+                except Empty:
+                    break
+
+            rows = [item for item in batch if not isinstance(item, threading.Event)]
+            if rows:
+                try:
+                    with self.transaction() as cursor:
+                        cursor.executemany(INSERT_LOG_SQL, rows)
+                except Exception as e:
+                    print(f"Logging failed: {e}")
+
+            # Wake up any flush_logs() callers waiting on this batch
+            for item in batch:
+                if isinstance(item, threading.Event):
+                    item.set()
 
 
 # --- Models ---
 
 class StorageUnit(ABC):
+    __slots__ = ()  # Lets subclasses with __slots__ skip the per-instance __dict__
+
     @abstractmethod
     def occupy_space(self, amount): pass
 
@@ -180,19 +381,30 @@ class StorageUnit(ABC):
 
 
 class StorageBin(StorageUnit):
+    __slots__ = ('bin_id', 'capacity', 'location_code', 'available')
+
     def __init__(self, bin_id, capacity, location_code):
         self.bin_id = bin_id
         self.capacity = capacity
         self.location_code = location_code
-        self.used_space = 0
+        self.available = capacity
+
+    # Derived from available, so the two can never disagree
+    @property
+    def used_space(self):
+        return self.capacity - self.available
+
+    @used_space.setter
+    def used_space(self, amount):
+        self.available = self.capacity - amount
 
     def occupy_space(self, amount):
-        if self.used_space + amount > self.capacity:
+        if amount > self.available:
             raise ValueError("Bin Full")
-        self.used_space += amount
+        self.available -= amount
 
     def available_space(self):
-        return self.capacity - self.used_space
+        return self.available
 
     # Needed for sorting
     def __lt__(self, other):
@@ -200,16 +412,123 @@ class StorageBin(StorageUnit):
 
 
 class Package:
+    __slots__ = ('tracking_id', 'size', 'destination')
+
     def __init__(self, tracking_id, size, destination):
         self.tracking_id = tracking_id
         self.size = size
         self.destination = destination
 
 
+# --- Truck loading helpers ---
+
+def _knap_value(pkgs, W):
+    # Final DP row only: dp[c] = best fill of pkgs using at most c units.
+    # The DP fill runs as a bitset of reachable sums, so the inner loop over
+    # capacities becomes a single big-int shift/or executed in C.
+    reach = 1
+    limit = (1 << (W + 1)) - 1
+    for pkg in pkgs:
+        reach |= (reach << pkg.size) & limit
+
+    bits = format(reach, 'b')[::-1].ljust(W + 1, '0')
+    # Packed int32 row (4 bytes per entry) unless the capacity needs int64
+    typecode = 'i' if W < 2 ** 31 else 'q'
+    return array(typecode, accumulate((c if bits[c] == '1' else 0 for c in range(W + 1)), max))
+
+
+def _reconstruct(pkgs, W):
+    # Split the packages in half, find how the capacity is best shared
+    # between both halves, then solve each half on its own share
+    if not pkgs:
+        return []
+    if len(pkgs) == 1:
+        return list(pkgs) if pkgs[0].size <= W else []
+
+    mid = len(pkgs) // 2
+    left, right = pkgs[:mid], pkgs[mid:]
+    dp_left = _knap_value(left, W)
+    dp_right = _knap_value(right[::-1], W)
+
+    split = max(range(W + 1), key=lambda c: dp_left[c] + dp_right[W - c])
+    return _reconstruct(left, split) + _reconstruct(right, W - split)
+
+
+def _backtrack(pkgs, W):
+    # Take/skip search over an explicit stack of (idx, size, taken_bitmask),
+    # avoiding a Python call frame and a list copy per visited state
+    best, best_mask = 0, 0
+    stack = [(0, 0, 0)]
+    while stack:
+        idx, size, taken = stack.pop()
+        if size > best:
+            best, best_mask = size, taken
+        if idx == len(pkgs):
+            continue
+
+        # Skip the package; take it too if it fits (explored first)
+        stack.append((idx + 1, size, taken))
+        if size + pkgs[idx].size <= W:
+            stack.append((idx + 1, size + pkgs[idx].size, taken | (1 << idx)))
+
+    return [p for i, p in enumerate(pkgs) if best_mask >> i & 1]
+
+
+def _enumerate_subsets(pkgs):
+    # Every (total_size, bitmask) pair over pkgs, built iteratively
+    subsets = [(0, 0)]
+    for i, pkg in enumerate(pkgs):
+        bit = 1 << i
+        subsets += [(s + pkg.size, mask | bit) for s, mask in subsets]
+    return subsets
+
+
+def _meet_in_the_middle(pkgs, W):
+    # Subset-sum by splitting the packages in two halves: O(2^(n/2) * n)
+    # instead of O(2^n), and works for float or very large sizes
+    if W < 0:
+        return []
+    half = (len(pkgs) + 1) // 2
+    first, second = pkgs[:half], pkgs[half:]
+
+    # Sorted sums of the second half; equal sums are dominated by the first seen
+    sums_b = []
+    for s, mask in sorted(_enumerate_subsets(second)):
+        if s > W:
+            break
+        if not sums_b or s > sums_b[-1][0]:
+            sums_b.append((s, mask))
+    keys_b = [s for s, _ in sums_b]
+
+    best, best_a, best_b = -1, 0, 0
+    for s_a, mask_a in _enumerate_subsets(first):
+        if s_a > W:
+            continue
+        j = bisect_right(keys_b, W - s_a) - 1
+        if s_a + keys_b[j] > best:
+            best, best_a, best_b = s_a + keys_b[j], mask_a, sums_b[j][1]
+
+    combo = [p for i, p in enumerate(first) if best_a >> i & 1]
+    combo += [p for i, p in enumerate(second) if best_b >> i & 1]
+    return combo
+
+
+# --- Controller access ---
+
+_controller = None
+
+
+def get_controller():
+    # Singleton: the controller is built on first access (WarehouseController
+    # registers itself in _controller) and reused after
+    if _controller is None:
+        return WarehouseController()
+    return _controller
+
+
 # --- Helper to populate DB ---
 
 def seed_database(ctrl):
-    cursor = ctrl.conn.cursor()
     # Pre-defined bins: Small to Large
     data = [
         (1, 50, 0, 'A1'),
@@ -218,8 +537,8 @@ def seed_database(ctrl):
         (4, 200, 0, 'B2'),
         (5, 500, 0, 'C1')
     ]
-    cursor.executemany('INSERT INTO bins VALUES (?, ?, ?, ?)', data)
-    ctrl.conn.commit()
+    with ctrl.transaction() as cursor:
+        cursor.executemany(INSERT_BIN_SQL, data)
     ctrl.load_inventory()  # Refresh memory
     print("Database seeded with empty bins.")
 
@@ -227,7 +546,7 @@ def seed_database(ctrl):
 # --- Main Execution ---
 
 if __name__ == '__main__':
-    system = WarehouseController()
+    system = get_controller()
     seed_database(system)
 
     # 1. Inbound: Packages arrive on conveyor
@@ -240,10 +559,10 @@ if __name__ == '__main__':
     for p in incoming:
         system.add_to_conveyor(p)
 
-    # Process them using Binary Search
+    # Process them using the best-fit segment tree
     system.run_conveyor()
 
-    # 2. Outbound: Optimize Truck Loading (Backtracking)
+    # 2. Outbound: Optimize Truck Loading (Knapsack DP)
     print("\n[Truck Loading] Calculating best fit for capacity 100...")
 
     # Scenario: We have 50, 60, and 40.